@@ -0,0 +1,27 @@
+"""Gunicorn configuration for serving the dashboard.
+
+Run from the repository root with:
+    gunicorn -c gunicorn.conf.py dashboard:server
+
+The command must be run from the repository root so the relative
+database and config paths resolve, just like for the other scripts;
+pythonpath = "src" (set below) only makes the dashboard module
+importable. The app is imported once before forking, so the
+workers share the static layout copy-on-write; each worker then
+reopens its own DuckDB connection and cursor pool in post_fork,
+because cursors cloned before the fork must not be shared across
+processes.
+"""
+
+bind = "0.0.0.0:8050"
+workers = 4
+threads = 2
+worker_class = "gthread"
+preload_app = True
+pythonpath = "src"
+
+
+def post_fork(server, worker):
+    import dashboard
+
+    dashboard.reset_pool()
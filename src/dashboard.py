@@ -1,24 +1,157 @@
+import json
+import queue
+from contextlib import contextmanager
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
+
 import duckdb
-from dash import Dash, dcc, html, Input, Output
+from dash import Dash, dash_table, dcc, html, Input, Output
 import plotly.graph_objects as go
 
 # Connect to DuckDB
 DUCKDB_PATH = "data/warehouse/weather_dwh.duckdb"
-con = duckdb.connect(DUCKDB_PATH, read_only=True)
+
+# Pool of cursor clones sharing the read-only database, so concurrent
+# callbacks do not serialize on a single connection
+POOL_SIZE = 8
+
+
+def _connect():
+    connection = duckdb.connect(DUCKDB_PATH, read_only=True)
+    connection.execute("PRAGMA threads=4")
+    connection.execute("PRAGMA enable_object_cache=true")
+    return connection
+
+
+def reset_pool():
+    """Reopen the connection and rebuild the cursor pool in this process.
+
+    Called from gunicorn's post_fork hook: with preload_app the module
+    is imported before forking, and DuckDB cursors cloned pre-fork must
+    not be shared across workers.
+    """
+    global con, _pool
+    con = _connect()
+    _pool = queue.Queue()
+    for _ in range(POOL_SIZE):
+        _pool.put(con.cursor())
+
+
+reset_pool()
+
+
+@contextmanager
+def _pooled_cursor():
+    cursor = _pool.get()
+    try:
+        yield cursor
+    finally:
+        _pool.put(cursor)
+
+
+CONFIG_FILE = Path("config.toml")
+CITIES_CACHE_FILE = Path("data/.cities.json")
+
+
+def _load_cities():
+    """Load the dropdown city list, cached on disk.
+
+    The list only changes when locations are added to config.toml, so it
+    is cached beside the data and keyed on the config file's mtime
+    instead of querying DuckDB on every startup.
+    """
+    config_mtime = CONFIG_FILE.stat().st_mtime if CONFIG_FILE.exists() else None
+    if CITIES_CACHE_FILE.exists():
+        cached = json.loads(CITIES_CACHE_FILE.read_text())
+        if cached.get("mtime") == config_mtime:
+            return cached["cities"]
+    cities = (
+        con.execute("""
+        SELECT DISTINCT city
+        FROM daily_data
+        ORDER BY city
+    """)
+        .pl()["city"]
+        .to_list()
+    )
+    CITIES_CACHE_FILE.write_text(json.dumps({"mtime": config_mtime, "cities": cities}))
+    return cities
+
 
 # Load available cities
-cities = (
-    con.execute("""
-    SELECT DISTINCT city
-    FROM daily_data
-    ORDER BY city
-""")
-    .fetchdf()["city"]
-    .tolist()
-)
+cities = _load_cities()
 
-# Create Dash app
+# Approximate chart width in pixels, used to downsample the graph traces
+CHART_WIDTH_PX = 1200
+
+# Rows per table page; only the visible page is queried and transferred
+TABLE_PAGE_SIZE = 50
+
+TABLE_COLUMNS = [
+    {"name": "Date", "id": "time"},
+    {"name": "Max Temp (°C)", "id": "temperature_2m_max"},
+    {"name": "Min Temp (°C)", "id": "temperature_2m_min"},
+    {"name": "Precipitation (mm)", "id": "precipitation_sum"},
+    {"name": "Precipitation Hours", "id": "precipitation_hours"},
+    {
+        "name": "Precipitation Probability Max (%)",
+        "id": "precipitation_probability_max",
+    },
+    {"name": "Snowfall (mm)", "id": "snowfall_sum"},
+    {"name": "Sunrise", "id": "sunrise"},
+    {"name": "Sunset", "id": "sunset"},
+    {"name": "Daylight Duration (h)", "id": "daylight_duration"},
+    {"name": "Sunshine Duration (h)", "id": "sunshine_duration"},
+    {"name": "UV Index Max", "id": "uv_index_max"},
+    {"name": "Wind Speed Max (km/h)", "id": "wind_speed_10m_max"},
+    {"name": "Wind Direction Dominant (°)", "id": "wind_direction_10m_dominant"},
+    {"name": "Wind Gusts Max (km/h)", "id": "wind_gusts_10m_max"},
+]
+
+# Conditional coloring as CSS rules evaluated client-side per cell,
+# instead of serializing one color string per cell over the wire
+TABLE_STYLE_CONDITIONAL = [
+    {
+        "if": {
+            "filter_query": "{temperature_2m_max} > 25",
+            "column_id": "temperature_2m_max",
+        },
+        "backgroundColor": "orange",
+    },
+    {
+        "if": {
+            "filter_query": "{temperature_2m_max} > 30",
+            "column_id": "temperature_2m_max",
+        },
+        "backgroundColor": "red",
+    },
+    {
+        "if": {
+            "filter_query": "{temperature_2m_min} < 0",
+            "column_id": "temperature_2m_min",
+        },
+        "backgroundColor": "lightblue",
+    },
+    {
+        "if": {
+            "filter_query": "{precipitation_sum} > 0",
+            "column_id": "precipitation_sum",
+        },
+        "backgroundColor": "lightblue",
+    },
+    {
+        "if": {
+            "filter_query": "{precipitation_sum} > 10",
+            "column_id": "precipitation_sum",
+        },
+        "backgroundColor": "blue",
+    },
+]
+
+# Create Dash app; the Flask server is what gunicorn workers fork from
 app = Dash(__name__)
+server = app.server
 
 app.layout = html.Div(
     [
@@ -30,47 +163,66 @@ app.layout = html.Div(
             clearable=False,
         ),
         dcc.Graph(id="weather-graph-daily"),
-        dcc.Graph(id="weather-table-daily"),
+        dash_table.DataTable(
+            id="weather-table-daily",
+            columns=TABLE_COLUMNS,
+            page_current=0,
+            page_size=TABLE_PAGE_SIZE,
+            page_action="custom",
+            style_header={"backgroundColor": "paleturquoise", "textAlign": "left"},
+            style_cell={"textAlign": "left"},
+            style_data_conditional=TABLE_STYLE_CONDITIONAL,
+        ),
     ]
 )
 
 
-@app.callback(
-    [Output("weather-graph-daily", "figure"), Output("weather-table-daily", "figure")],
-    Input("city-dropdown", "value"),
-)
-def update_daily_data(city):
-    df = con.execute(
-        """
-        SELECT
-            time,
-            temperature_2m_max,
-            temperature_2m_min,
-            precipitation_sum,
-            precipitation_hours,
-            precipitation_probability_max,
-            snowfall_sum,
-            sunrise,
-            sunset,
-            daylight_duration,
-            sunshine_duration,
-            uv_index_max,
-            wind_speed_10m_max,
-            wind_direction_10m_dominant,
-            wind_gusts_10m_max
-        FROM daily_data
-        WHERE city = ?
-        ORDER BY time
-    """,
-        [city],
-    ).fetchdf()
+@lru_cache(maxsize=64)
+def _build_figure(city, day):
+    """Build the daily graph figure for a city.
+
+    Cached per (city, day) so reselecting a city does not re-run the
+    DuckDB query and figure construction; the day key invalidates the
+    cache once new data arrives.
+    """
+    # M4-style downsampling for the graph traces: aggregate per pixel
+    # bucket in DuckDB so the payload stays bounded by the chart width
+    # instead of growing with the amount of history loaded
+    with _pooled_cursor() as cursor:
+        df_chart = cursor.execute(
+            """
+            WITH span AS (
+                SELECT epoch(min(time)) AS t0, epoch(max(time)) AS t1
+                FROM daily_data
+                WHERE city = ?
+            )
+            SELECT
+                CAST(
+                    ? * (epoch(time) - span.t0) / greatest(span.t1 - span.t0, 1)
+                    AS BIGINT
+                ) AS bucket,
+                min(time) AS time,
+                max(temperature_2m_max) AS temperature_2m_max,
+                min(temperature_2m_min) AS temperature_2m_min,
+                sum(precipitation_sum) AS precipitation_sum
+            FROM daily_data, span
+            WHERE city = ?
+            GROUP BY bucket
+            ORDER BY bucket
+        """,
+            [city, CHART_WIDTH_PX, city],
+        ).pl()
+
+    # DuckDB -> Polars goes over the Arrow C Data Interface without a
+    # pandas materialization; Plotly consumes the numpy views directly
+    chart_time = df_chart["time"].to_numpy()
 
     fig = go.Figure()
 
     fig.add_trace(
         go.Scatter(
-            x=df["time"],
-            y=df["temperature_2m_max"],
+            x=chart_time,
+            y=df_chart["temperature_2m_max"].to_numpy(),
             name="Max Temp",
             mode="lines",
         )
@@ -78,8 +230,8 @@ def update_daily_data(city):
 
     fig.add_trace(
         go.Scatter(
-            x=df["time"],
-            y=df["temperature_2m_min"],
+            x=chart_time,
+            y=df_chart["temperature_2m_min"].to_numpy(),
             name="Min Temp",
             mode="lines",
         )
@@ -87,86 +239,14 @@ def update_daily_data(city):
 
     fig.add_trace(
         go.Bar(
-            x=df["time"],
-            y=df["precipitation_sum"],
+            x=chart_time,
+            y=df_chart["precipitation_sum"].to_numpy(),
             name="Precipitation",
             yaxis="y2",
             opacity=0.3,
         )
     )
 
-    nrows = len(df)
-    fill_colors = []
-    for col in df.columns:
-        # Conditional coloring only for specific columns
-        if col == "temperature_2m_max":
-            colors = [
-                "red" if v > 30 else "orange" if v > 25 else "white" for v in df[col]
-            ]
-
-        elif col == "temperature_2m_min":
-            colors = ["lightblue" if v < 0 else "white" for v in df[col]]
-
-        elif col == "precipitation_sum":
-            colors = [
-                "blue" if v > 10 else "lightblue" if v > 0 else "white" for v in df[col]
-            ]
-
-        # All other columns → no coloring
-        else:
-            colors = ["white"] * nrows
-
-        fill_colors.append(colors)
-
-    table = go.Figure(
-        data=[
-            go.Table(
-                header=dict(
-                    values=[
-                        "Date",
-                        "Max Temp (°C)",
-                        "Min Temp (°C)",
-                        "Precipitation (mm)",
-                        "Precipitation Hours",
-                        "Precipitation Probability Max (%)",
-                        "Snowfall (mm)",
-                        "Sunrise",
-                        "Sunset",
-                        "Daylight Duration (h)",
-                        "Sunshine Duration (h)",
-                        "UV Index Max",
-                        "Wind Speed Max (km/h)",
-                        "Wind Direction Dominant (°)",
-                        "Wind Gusts Max (km/h)",
-                    ],
-                    fill_color="paleturquoise",
-                    align="left",
-                ),
-                cells=dict(
-                    values=[
-                        df["time"],
-                        df["temperature_2m_max"],
-                        df["temperature_2m_min"],
-                        df["precipitation_sum"],
-                        df["precipitation_hours"],
-                        df["precipitation_probability_max"],
-                        df["snowfall_sum"],
-                        df["sunrise"].dt.strftime("%H:%M"),
-                        df["sunset"].dt.strftime("%H:%M"),
-                        df["daylight_duration"] / 3600,  # Convert seconds to hours
-                        df["sunshine_duration"] / 3600,  # Convert seconds to hours
-                        df["uv_index_max"],
-                        df["wind_speed_10m_max"],
-                        df["wind_direction_10m_dominant"],
-                        df["wind_gusts_10m_max"],
-                    ],
-                    fill_color=fill_colors,
-                    align="left",
-                ),
-            )
-        ]
-    )
-
     fig.update_layout(
         title=f"Weather in {city}",
         xaxis_title="Date",
@@ -174,11 +254,64 @@ def update_daily_data(city):
         yaxis2=dict(title="Precipitation (mm)", overlaying="y", side="right"),
         height=500,
     )
-    table.update_layout(title=f"Daily Weather Data for {city}", height=400)
-    return table, fig
-
     return fig
 
 
+@app.callback(
+    Output("weather-graph-daily", "figure"),
+    Input("city-dropdown", "value"),
+)
+def update_daily_data(city):
+    return _build_figure(city, date.today().isoformat())
+
+
+@app.callback(
+    [
+        Output("weather-table-daily", "data"),
+        Output("weather-table-daily", "page_count"),
+    ],
+    [
+        Input("city-dropdown", "value"),
+        Input("weather-table-daily", "page_current"),
+    ],
+)
+def update_daily_table(city, page_current):
+    """Serve one table page from DuckDB; only visible rows are transferred"""
+    with _pooled_cursor() as cursor:
+        total_rows = cursor.execute(
+            "SELECT count(*) FROM daily_data WHERE city = ?",
+            [city],
+        ).fetchone()[0]
+
+        page_table = cursor.execute(
+            """
+            SELECT
+                strftime(time, '%Y-%m-%d') AS time,
+                temperature_2m_max,
+                temperature_2m_min,
+                precipitation_sum,
+                precipitation_hours,
+                precipitation_probability_max,
+                snowfall_sum,
+                sunrise_s AS sunrise,
+                sunset_s AS sunset,
+                daylight_h AS daylight_duration,
+                sunshine_h AS sunshine_duration,
+                uv_index_max,
+                wind_speed_10m_max,
+                wind_direction_10m_dominant,
+                wind_gusts_10m_max
+            FROM daily_data_v
+            WHERE city = ?
+            ORDER BY time
+            LIMIT ? OFFSET ?
+        """,
+            [city, TABLE_PAGE_SIZE, page_current * TABLE_PAGE_SIZE],
+        ).pl()
+
+    page_count = -(-total_rows // TABLE_PAGE_SIZE)
+    return page_table.to_dicts(), page_count
+
+
 if __name__ == "__main__":
     app.run(debug=True)
@@ -1,13 +1,18 @@
 """Utility functions for the data pipeline"""
 
-import json
+import numpy as np
+import orjson
 from typing import Type
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date
+from functools import lru_cache
 import requests
+from requests.adapters import HTTPAdapter, Retry
 from abc import ABC, abstractmethod
 from pathlib import Path
+from urllib.parse import urlencode
 import tomllib
-from pydantic import BaseModel, Field, field_validator, model_validator
+from pydantic import BaseModel, Field, model_validator
 
 
 class Location(BaseModel):
@@ -17,20 +22,6 @@ class Location(BaseModel):
     latitude: float
     longitude: float
 
-    @field_validator("latitude")
-    @classmethod
-    def validate_latitude(cls, v: float) -> float:
-        if not (-90 <= v <= 90):
-            raise ValueError("Latitude must be between -90 and 90 degrees.")
-        return v
-
-    @field_validator("longitude")
-    @classmethod
-    def validate_longitude(cls, v: float) -> float:
-        if not (-180 <= v <= 180):
-            raise ValueError("Longitude must be between -180 and 180 degrees.")
-        return v
-
 
 class Config(BaseModel):
     """Holds configuration data"""
@@ -44,9 +35,32 @@ class Config(BaseModel):
             raise ValueError("At least one location must be provided.")
         return values
 
-
+    @model_validator(mode="after")
+    def check_coordinates(self):
+        # Bulk range check in NumPy instead of one Python validator call
+        # per field per location
+        latitudes = np.array([location.latitude for location in self.locations])
+        longitudes = np.array([location.longitude for location in self.locations])
+        latitude_mask = (latitudes >= -90) & (latitudes <= 90)
+        longitude_mask = (longitudes >= -180) & (longitudes <= 180)
+        if not latitude_mask.all():
+            offender = int(np.argmax(~latitude_mask))
+            raise ValueError(
+                "Latitude must be between -90 and 90 degrees "
+                f"(got {latitudes[offender]} for '{self.locations[offender].city}')."
+            )
+        if not longitude_mask.all():
+            offender = int(np.argmax(~longitude_mask))
+            raise ValueError(
+                "Longitude must be between -180 and 180 degrees "
+                f"(got {longitudes[offender]} for '{self.locations[offender].city}')."
+            )
+        return self
+
+
+@lru_cache(maxsize=1)
 def load_config(filename: str | Path = "config.toml") -> Config:
-    """Loads configuration file"""
+    """Loads configuration file; the parsed result is cached per process"""
     path = Path(filename)
     if not path.exists():
         raise FileNotFoundError(f"Configuration file '{filename}' not found.")
@@ -75,6 +89,7 @@ class UrlBuilder(ABC):
         self.api_version = api_version
         self.daily_parameters = daily_params
         self.hourly_parameters = hourly_params
+        self.locations = locations
         self.latitude_string, self.longitude_string = (
             self._create_comma_separated_list_of_coordinates(locations)
         )
@@ -82,22 +97,25 @@ class UrlBuilder(ABC):
     def _create_comma_separated_list_of_coordinates(
         self, locations: list[Location]
     ) -> tuple[str, str]:
-        latitude_string: str = "latitude="
-        longitude_string: str = "longitude="
-        counter = 0
-        for location in locations:
-            latitude_string = latitude_string + str(location.latitude)
-            longitude_string = longitude_string + str(location.longitude)
-            counter += 1
-            if counter < len(locations):
-                latitude_string = latitude_string + ","
-                longitude_string = longitude_string + ","
+        latitude_string = ",".join(str(location.latitude) for location in locations)
+        longitude_string = ",".join(str(location.longitude) for location in locations)
         return latitude_string, longitude_string
 
     @abstractmethod
-    def build_url(self) -> str:
+    def _build_query(self, latitude_string: str, longitude_string: str) -> str:
         pass
 
+    def build_url(self) -> str:
+        """Create one URL covering all locations in a single request"""
+        return self._build_query(self.latitude_string, self.longitude_string)
+
+    def build_urls(self) -> list[str]:
+        """Create one URL per location so requests can run in parallel"""
+        return [
+            self._build_query(str(location.latitude), str(location.longitude))
+            for location in self.locations
+        ]
+
 
 class ForecastUrlBuilder(UrlBuilder):
     """details of API url and methods to dynamically create it"""
@@ -107,8 +125,19 @@ class ForecastUrlBuilder(UrlBuilder):
         self.path = path
         self.forecast_days = forecast_days
 
-    def build_url(self):
-        return f"{self.base_url}/{self.api_version}/{self.path}?{self.latitude_string}&{self.longitude_string}&daily={self.daily_parameters}&hourly={self.hourly_parameters}&forecast_days={self.forecast_days}&timezone=auto"
+    def _build_query(self, latitude_string, longitude_string):
+        query = urlencode(
+            {
+                "latitude": latitude_string,
+                "longitude": longitude_string,
+                "daily": self.daily_parameters,
+                "hourly": self.hourly_parameters,
+                "forecast_days": self.forecast_days,
+                "timezone": "auto",
+            },
+            safe=",",
+        )
+        return f"{self.base_url}/{self.api_version}/{self.path}?{query}"
 
 
 class HistoricalUrlBuilder(UrlBuilder):
@@ -127,8 +156,20 @@ class HistoricalUrlBuilder(UrlBuilder):
         self.start_date = start_date
         self.end_date = end_date
 
-    def build_url(self):
-        return f"{self.base_url}/{self.api_version}/{self.path}?{self.latitude_string}&{self.longitude_string}&daily={self.daily_parameters}&hourly={self.hourly_parameters}&start_date={self.start_date}&end_date={self.end_date}&timezone=auto"
+    def _build_query(self, latitude_string, longitude_string):
+        query = urlencode(
+            {
+                "latitude": latitude_string,
+                "longitude": longitude_string,
+                "daily": self.daily_parameters,
+                "hourly": self.hourly_parameters,
+                "start_date": self.start_date,
+                "end_date": self.end_date,
+                "timezone": "auto",
+            },
+            safe=",",
+        )
+        return f"{self.base_url}/{self.api_version}/{self.path}?{query}"
 
 
 class RawDataHandler:
@@ -145,36 +186,67 @@ class RawDataHandler:
         self.url_builder = url_builder_class(**builder_kwargs, locations=locations)
         self.destination_folder = Path(destination_folder)
         self.destination_folder.mkdir(parents=True, exist_ok=True)
+        # Shared session: keep-alive connections plus retries with backoff
+        self.session = requests.Session()
+        self.session.mount(
+            "https://",
+            HTTPAdapter(
+                pool_connections=32,
+                pool_maxsize=32,
+                max_retries=Retry(
+                    total=3,
+                    backoff_factor=0.3,
+                    status_forcelist=[429, 500, 502, 503, 504],
+                ),
+            ),
+        )
 
     def _generate_filename_with_date(self) -> str:
         current_date = datetime.now().strftime("%Y-%m-%d")
         return f"raw_{current_date}.json"
 
-    def fetch_raw_data(self) -> list[dict]:
-        url = self.url_builder.build_url()
+    def _fetch_single_url(self, url: str) -> dict:
         data = {}
         try:
-            response = requests.get(url)
+            response = self.session.get(url, timeout=30)
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
         except requests.exceptions.RequestException as e:
             print(f"HTTP Request failed: {e}")
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             print(f"Failed to parse JSON: {e}")
         return data
 
-    def enrich_raw_data(self, data: list[dict]) -> list[dict]:
-        """Add city information to the raw data for better traceability"""
-        for i in range(len(data)):
-            data[i]["city"] = self.locations[i].city
-        return data
+    def fetch_raw_data(self) -> list[dict]:
+        urls = self.url_builder.build_urls()
+        # I/O-bound fan-out: fetch each location concurrently, keeping
+        # the result order aligned with the configured locations
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            return list(executor.map(self._fetch_single_url, urls))
 
-    def save_raw_data(self, data: list):
+    def enrich_raw_data(self, data: list[dict]) -> list[dict]:
+        """Add city information to the raw data and drop failed fetches.
+
+        A failed fetch comes back as an empty dict; keeping it would
+        write an entry without coordinates into the raw file and crash
+        the validation run for every city. Failures are logged and
+        dropped so the remaining locations still go through.
+        """
+        enriched = []
+        for location, entry in zip(self.locations, data):
+            if not entry:
+                print(f"Dropping '{location.city}': fetch returned no data")
+                continue
+            entry["city"] = location.city
+            enriched.append(entry)
+        return enriched
+
+    def save_raw_data(self, data: list, pretty: bool = False):
         try:
             filename = self._generate_filename_with_date()
             file_path = self.destination_folder / filename
-            with open(file_path, "w") as f:
-                json.dump(data, f, indent=4)
+            with open(file_path, "wb") as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0))
             print(f"Raw data saved successfully to {file_path}")
         except Exception as e:
             print(f"Failed to save raw JSON data: {e}")
@@ -1,77 +1,141 @@
 """Validating raw JSON files and loading them into Parquet"""
 
+from functools import partial
 from pathlib import Path
 from datetime import datetime
-import json
+import numpy as np
 import polars as pl
+import pyarrow.parquet as pq
+import simdjson
 
 
-HOURLY_RAW_SCHEMA = {
-    "time": pl.Utf8(),
-    "temperature_2m": pl.Float64,
-    "precipitation": pl.Float64,
-    "precipitation_probability": pl.Int64,
-    "cloud_cover": pl.Int64,
-    "weather_code": pl.Int64,
-    "wind_speed_10m": pl.Float64,
-    "wind_direction_10m": pl.Int64,
-}
-HOURLY_FINAL_SCHEMA = {
-    "time": pl.Datetime("us"),
-    "temperature_2m": pl.Float64,
-    "precipitation": pl.Float64,
-    "precipitation_probability": pl.Int64,
-    "cloud_cover": pl.Int64,
-    "weather_code": pl.Int64,
-    "wind_speed_10m": pl.Float64,
-    "wind_direction_10m": pl.Int64,
-}
-
-DAILY_RAW_SCHEMA = {
-    "time": pl.Utf8(),
-    "temperature_2m_max": pl.Float64,
-    "temperature_2m_min": pl.Float64,
-    "sunrise": pl.Utf8(),
-    "sunset": pl.Utf8(),
-    "daylight_duration": pl.Float64,
-    "sunshine_duration": pl.Float64,
-    "uv_index_max": pl.Float64,
-    "precipitation_sum": pl.Float64,
-    "precipitation_hours": pl.Float64,
-    "snowfall_sum": pl.Float64,
-    "precipitation_probability_max": pl.Int64,
-    "wind_speed_10m_max": pl.Float64,
-    "wind_direction_10m_dominant": pl.Int64,
-    "wind_gusts_10m_max": pl.Float64,
-}
-DAILY_FINAL_SCHEMA = {
-    "time": pl.Date,
-    "temperature_2m_max": pl.Float64,
-    "temperature_2m_min": pl.Float64,
-    "sunrise": pl.Datetime("us"),
-    "sunset": pl.Datetime("us"),
-    "daylight_duration": pl.Float64,
-    "sunshine_duration": pl.Float64,
-    "uv_index_max": pl.Float64,
-    "precipitation_sum": pl.Float64,
-    "precipitation_hours": pl.Float64,
-    "snowfall_sum": pl.Float64,
-    "precipitation_probability_max": pl.Int64,
-    "wind_speed_10m_max": pl.Float64,
-    "wind_direction_10m_dominant": pl.Int64,
-    "wind_gusts_10m_max": pl.Float64,
-}
+# schemas are built as pl.Schema objects once at import, so the
+# dict -> Schema conversion does not repeat on every frame construction
+HOURLY_RAW_SCHEMA = pl.Schema(
+    {
+        "time": pl.Utf8(),
+        "temperature_2m": pl.Float64,
+        "precipitation": pl.Float64,
+        "precipitation_probability": pl.Int64,
+        "cloud_cover": pl.Int64,
+        "weather_code": pl.Int64,
+        "wind_speed_10m": pl.Float64,
+        "wind_direction_10m": pl.Int64,
+    }
+)
+# bounded integers are narrowed to the smallest sufficient width:
+# percentages and WMO codes fit UInt8, wind directions (0-360) UInt16
+HOURLY_FINAL_SCHEMA = pl.Schema(
+    {
+        "time": pl.Datetime("us"),
+        "temperature_2m": pl.Float64,
+        "precipitation": pl.Float64,
+        "precipitation_probability": pl.UInt8,
+        "cloud_cover": pl.UInt8,
+        "weather_code": pl.UInt8,
+        "wind_speed_10m": pl.Float64,
+        "wind_direction_10m": pl.UInt16,
+    }
+)
+
+DAILY_RAW_SCHEMA = pl.Schema(
+    {
+        "time": pl.Utf8(),
+        "temperature_2m_max": pl.Float64,
+        "temperature_2m_min": pl.Float64,
+        "sunrise": pl.Utf8(),
+        "sunset": pl.Utf8(),
+        "daylight_duration": pl.Float64,
+        "sunshine_duration": pl.Float64,
+        "uv_index_max": pl.Float64,
+        "precipitation_sum": pl.Float64,
+        "precipitation_hours": pl.Float64,
+        "snowfall_sum": pl.Float64,
+        "precipitation_probability_max": pl.Int64,
+        "wind_speed_10m_max": pl.Float64,
+        "wind_direction_10m_dominant": pl.Int64,
+        "wind_gusts_10m_max": pl.Float64,
+    }
+)
+DAILY_FINAL_SCHEMA = pl.Schema(
+    {
+        "time": pl.Date,
+        "temperature_2m_max": pl.Float64,
+        "temperature_2m_min": pl.Float64,
+        "sunrise": pl.Datetime("us"),
+        "sunset": pl.Datetime("us"),
+        "daylight_duration": pl.Float64,
+        "sunshine_duration": pl.Float64,
+        "uv_index_max": pl.Float64,
+        "precipitation_sum": pl.Float64,
+        "precipitation_hours": pl.Float64,
+        "snowfall_sum": pl.Float64,
+        "precipitation_probability_max": pl.UInt8,
+        "wind_speed_10m_max": pl.Float64,
+        "wind_direction_10m_dominant": pl.UInt16,
+        "wind_gusts_10m_max": pl.Float64,
+    }
+)
+
+
+# fixed timestamp formats used by the Open-Meteo API
+DATE_FORMAT = "%Y-%m-%d"
+DATETIME_FORMAT = "%Y-%m-%dT%H:%M"
+
+
+# the raw payload fields the pipeline actually consumes; everything else
+# (elevation, timezone, generationtime_ms, ...) is skipped during parsing
+_RAW_ENTRY_KEYS = ("latitude", "longitude", "city")
+
+_json_parser = simdjson.Parser()
 
 
 def read_json_data(filename: str | Path) -> list[dict]:
-    """Read JSON data from a file and return it as a dictionary."""
-    data: list[dict] = []
+    """Read JSON data from a file and return it as a dictionary.
+
+    Parsed with simdjson's on-demand API: the SIMD tokenizer runs over
+    the whole buffer once, but only the fields the pipeline needs are
+    materialized into Python objects.
+    """
     try:
-        data = json.load(open(filename, "r"))
-        return data
-    except json.JSONDecodeError as e:
+        document = _json_parser.parse(Path(filename).read_bytes())
+    except ValueError as e:
         print(f"Error decoding JSON from file {filename}: {e}")
         raise
+    data = []
+    for entry in document:
+        materialized = {key: entry[key] for key in _RAW_ENTRY_KEYS}
+        materialized["hourly"] = entry["hourly"].as_dict()
+        materialized["daily"] = entry["daily"].as_dict()
+        data.append(materialized)
+    return data
+
+
+# numeric dtypes that can be handed to Polars as numpy buffers
+_NUMERIC_NP_DTYPES = {pl.Float64: np.float64, pl.Int64: np.int64}
+
+
+def _to_columnar(data: dict, schema: pl.Schema) -> dict:
+    """Convert numeric JSON lists to numpy arrays before frame construction.
+
+    Arrays expose the buffer protocol, so Polars ingests contiguous
+    memory instead of unboxing one Python object per element. Columns
+    with nulls (or non-numeric types) stay as plain lists.
+    """
+    columnar = {}
+    for column, dtype in schema.items():
+        values = data[column]
+        np_dtype = _NUMERIC_NP_DTYPES.get(dtype.base_type())
+        # numpy would coerce None to NaN for float columns, which loses
+        # null semantics downstream (NULL is skipped by aggregates, NaN
+        # propagates) -- columns containing None keep the list path
+        if np_dtype is not None and None not in values:
+            try:
+                values = np.asarray(values, dtype=np_dtype)
+            except TypeError, ValueError:
+                pass
+        columnar[column] = values
+    return columnar
 
 
 def parse_data_dict_strict_to_polars(
@@ -81,126 +145,145 @@ def parse_data_dict_strict_to_polars(
 ) -> pl.DataFrame:
     """Load hourly or daily data from a dictionary into a Polars DataFrame and enforce schema"""
     try:
-        df = pl.DataFrame(data, schema=raw_schema, strict=True)
+        df = pl.DataFrame(
+            _to_columnar(data, raw_schema), schema=raw_schema, strict=True
+        )
     except Exception as e:
         raise ValueError(f"Raw schema validation failed: {e}")
 
+    # only the columns whose dtype actually changes (the temporal ones)
+    # need a second pass; everything else is already validated above.
+    # The Open-Meteo timestamps have a fixed ISO format, so parse them
+    # with an explicit format string instead of a generic cast
+    cast_expressions = []
+    for column, dtype in final_schema.items():
+        if raw_schema[column] == dtype:
+            continue
+        if dtype.base_type() == pl.Date:
+            expression = pl.col(column).str.to_date(format=DATE_FORMAT, strict=True)
+        elif dtype.base_type() == pl.Datetime:
+            expression = pl.col(column).str.to_datetime(
+                format=DATETIME_FORMAT, time_unit="us", strict=True
+            )
+        else:
+            expression = pl.col(column).cast(dtype, strict=True)
+        cast_expressions.append(expression)
     try:
-        df = df.cast(final_schema, strict=True)
+        df = df.with_columns(cast_expressions)
     except Exception as e:
         raise ValueError(f"Final schema validation failed: {e}")
 
     return df
 
 
-def create_polars_dataframes_from_json(
-    json_file: str | Path,
-    hourly_raw_schema: pl.Schema = HOURLY_RAW_SCHEMA,
-    hourly_final_schema: pl.Schema = HOURLY_FINAL_SCHEMA,
-    daily_raw_schema: pl.Schema = DAILY_RAW_SCHEMA,
-    daily_final_schema: pl.Schema = DAILY_FINAL_SCHEMA,
-) -> tuple[pl.DataFrame, pl.DataFrame]:
-    """Load JSON data from a file, validate it, concat elements and return as Polars Dfs"""
-    data = read_json_data(json_file)
-    hourly_tables = []
-    daily_tables = []
-    for i in range(len(data)):
-        # hourly data
-        hourly_pldf = parse_data_dict_strict_to_polars(
-            data[i]["hourly"],
-            hourly_raw_schema,
-            hourly_final_schema,
-        )
-        # additional information to the DataFrame
-        hourly_pldf = hourly_pldf.with_columns(
-            pl.lit(data[i]["latitude"]).alias("latitude"),
-            pl.lit(data[i]["longitude"]).alias("longitude"),
-            pl.lit(data[i]["city"]).alias("city"),
-            pl.lit(datetime.now()).alias("log_time"),
-        )
-
-        # append table to list
-        hourly_tables.append(hourly_pldf)
-
-        # daily data
-        daily_pldf = parse_data_dict_strict_to_polars(
-            data[i]["daily"],
-            daily_raw_schema,
-            daily_final_schema,
-        )
-        # additional information to the DataFrame
-        daily_pldf = daily_pldf.with_columns(
-            pl.lit(data[i]["latitude"]).alias("latitude"),
-            pl.lit(data[i]["longitude"]).alias("longitude"),
-            pl.lit(data[i]["city"]).alias("city"),
-            pl.lit(datetime.now()).alias("log_time"),
-        )
-
-        # append table to list
-        daily_tables.append(daily_pldf)
+# schema-bound parsers created once at import; the hot loop calls these
+# instead of threading the schema pair through every invocation
+_parse_hourly = partial(
+    parse_data_dict_strict_to_polars,
+    raw_schema=HOURLY_RAW_SCHEMA,
+    final_schema=HOURLY_FINAL_SCHEMA,
+)
+_parse_daily = partial(
+    parse_data_dict_strict_to_polars,
+    raw_schema=DAILY_RAW_SCHEMA,
+    final_schema=DAILY_FINAL_SCHEMA,
+)
 
-    # concatenate all tables into one
-    full_hourly_table = pl.concat(hourly_tables, how="vertical", rechunk=True)
-    full_daily_table = pl.concat(daily_tables, how="vertical", rechunk=True)
 
-    return full_hourly_table, full_daily_table
+def _attach_metadata_columns(
+    table: pl.DataFrame,
+    entry: dict,
+    log_time: datetime,
+) -> pl.DataFrame:
+    """Add the location metadata and load timestamp to one city's table"""
+    return table.sort("time").with_columns(
+        pl.lit(entry["latitude"], dtype=pl.Float64).alias("latitude"),
+        pl.lit(entry["longitude"], dtype=pl.Float64).alias("longitude"),
+        pl.lit(entry["city"], dtype=pl.Utf8).alias("city"),
+        pl.lit(log_time).alias("log_time"),
+    )
 
 
-def save_polars_dataframes_to_parquet(
-    hourly_table: pl.DataFrame,
-    daily_table: pl.DataFrame,
-    parquet_folder: str | Path,
+def stream_json_to_parquet(
+    json_file: str | Path,
+    hourly_file: Path,
+    daily_file: Path,
 ) -> None:
-    current_date = datetime.now().strftime("%Y-%m-%d")
+    """Parse raw JSON per city and stream row groups straight to Parquet.
 
-    # make sure folder exists
-    Path(parquet_folder).mkdir(parents=True, exist_ok=True)
+    Parse and write are fused: each city's frames are written out as
+    soon as they are validated, so peak memory stays at one city's worth
+    of rows instead of the whole dataset. Iterating the cities in sorted
+    order keeps the output ordered by (city, time), which preserves the
+    tight row-group statistics the downstream scans rely on.
+    """
+    data = read_json_data(json_file)
+    # one shared timestamp for the whole run: rows of the same load carry
+    # an identical log_time, which also compresses well in Parquet
+    log_time = datetime.now()
 
-    # write hourly parquet file
-    hourly_table.write_parquet(
-        Path(parquet_folder) / f"hourly_data_{current_date}.parquet",
-    )
-    # write daily parquet file
-    daily_table.write_parquet(
-        Path(parquet_folder) / f"daily_data_{current_date}.parquet",
-    )
+    hourly_file.parent.mkdir(parents=True, exist_ok=True)
 
+    writers: dict[str, pq.ParquetWriter | None] = {"hourly": None, "daily": None}
+    try:
+        for entry in sorted(data, key=lambda e: e["city"]):
+            tables = {
+                "hourly": _parse_hourly(entry["hourly"]),
+                "daily": _parse_daily(entry["daily"]),
+            }
+            for label, file_path in (("hourly", hourly_file), ("daily", daily_file)):
+                table = _attach_metadata_columns(
+                    tables[label], entry, log_time
+                ).to_arrow()
+                if writers[label] is None:
+                    writers[label] = pq.ParquetWriter(
+                        file_path,
+                        table.schema,
+                        compression="zstd",
+                        compression_level=3,
+                    )
+                writers[label].write_table(table)
+    finally:
+        for writer in writers.values():
+            if writer is not None:
+                writer.close()
 
-def sanity_check_parquet_files(parquet_folder: str | Path) -> None:
-    """Perform a sanity check on the generated Parquet files."""
-    current_date = datetime.now().strftime("%Y-%m-%d")
-    hourly_file = Path(parquet_folder) / f"hourly_data_{current_date}.parquet"
-    daily_file = Path(parquet_folder) / f"daily_data_{current_date}.parquet"
 
-    if not hourly_file:
-        print("No hourly Parquet files found for today.")
+def build_parquet_paths(
+    parquet_folder: str | Path,
+    current_date: str,
+) -> tuple[Path, Path]:
+    """Return the (hourly, daily) Parquet paths for a run date"""
+    folder = Path(parquet_folder)
+    return (
+        folder / f"hourly_data_{current_date}.parquet",
+        folder / f"daily_data_{current_date}.parquet",
+    )
 
-    if not daily_file:
-        print("No daily Parquet files found for today.")
 
-    try:
-        df = pl.read_parquet(hourly_file)
-        print(f"Successfully read hourly Parquet file: {hourly_file}")
-    except Exception as e:
-        print(f"Error reading hourly Parquet file {hourly_file}: {e}")
-    try:
-        print(f"Schema of hourly Parquet file {hourly_file}: {df.schema}")
-        print(f"{df.shape[0]} rows, {df.shape[1]} columns")
-        print(f"{df.head()}")
-    except Exception as e:
-        print(f"Error inspecting hourly Parquet file {hourly_file}: {e}")
+def sanity_check_parquet_files(hourly_file: Path, daily_file: Path) -> None:
+    """Perform a sanity check on the generated Parquet files.
 
-    try:
-        df = pl.read_parquet(daily_file)
-        print(f"Successfully read daily Parquet file: {daily_file}")
-    except Exception as e:
-        print(f"Error reading daily Parquet file {daily_file}: {e}")
-    try:
-        print(f"Schema of daily Parquet file {daily_file}: {df.schema}")
-        print(f"{df.shape[0]} rows, {df.shape[1]} columns")
-        print(f"{df.head()}")
-    except Exception as e:
-        print(f"Error inspecting daily Parquet file {daily_file}: {e}")
+    Only the footer metadata and the first row group are touched; the
+    bulk of the files is never decompressed.
+    """
+    files = {
+        "hourly": hourly_file,
+        "daily": daily_file,
+    }
+    for label, file_path in files.items():
+        if not file_path.exists():
+            print(f"No {label} Parquet file found for today.")
+            continue
+        try:
+            lazy_frame = pl.scan_parquet(file_path)
+            schema = lazy_frame.collect_schema()
+            n_rows = lazy_frame.select(pl.len()).collect().item()
+            print(f"Schema of {label} Parquet file {file_path}: {schema}")
+            print(f"{n_rows} rows, {len(schema)} columns")
+            print(f"{lazy_frame.head().collect()}")
+        except Exception as e:
+            print(f"Error inspecting {label} Parquet file {file_path}: {e}")
     print("Sanity check completed.")
 
 
@@ -209,9 +292,10 @@ def validate_and_load_json_to_parquet(
     parquet_folder: str | Path,
 ) -> None:
     """Validate raw JSON data and load it into Parquet files."""
-    hourly_table, daily_table = create_polars_dataframes_from_json(json_file)
-    save_polars_dataframes_to_parquet(hourly_table, daily_table, parquet_folder)
-    sanity_check_parquet_files(parquet_folder)
+    current_date = datetime.now().strftime("%Y-%m-%d")
+    hourly_file, daily_file = build_parquet_paths(parquet_folder, current_date)
+    stream_json_to_parquet(json_file, hourly_file, daily_file)
+    sanity_check_parquet_files(hourly_file, daily_file)
 
 
 if __name__ == "__main__":
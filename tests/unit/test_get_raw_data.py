@@ -2,7 +2,7 @@
 
 import pytest
 
-from utils import Location
+from utils import Config
 from pydantic import ValidationError
 
 
@@ -19,11 +19,12 @@ from pydantic import ValidationError
     ],
 )
 def test_valid_locations_parsed(city, latitude, longitude, should_fail):
+    locations = [{"city": city, "latitude": latitude, "longitude": longitude}]
     if should_fail:
         with pytest.raises(ValidationError):
-            Location(city=city, latitude=latitude, longitude=longitude)
+            Config(locations=locations)
     else:
-        location = Location(city=city, latitude=latitude, longitude=longitude)
+        location = Config(locations=locations).locations[0]
         assert location.city == city
         assert location.latitude == latitude
         assert location.longitude == longitude